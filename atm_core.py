@@ -1,92 +1,260 @@
 import json
 import os
 import logging
+from array import array
+from contextlib import contextmanager
+from functools import lru_cache, reduce
+from math import gcd
+from types import MappingProxyType
+from typing import Any, Iterator, Mapping, Optional
 from exceptions import ATMError, InsufficientFundsError, InvalidAmountError
+from atm_kernels import dp_breakdown, np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+# A dispensing plan as (denomination, count) pairs, highest denomination first.
+Plan = tuple[tuple[int, int], ...]
+
+_UNREACHABLE = 10**9
+# Note counts live in a signed 64-bit array('q').
+_MAX_COUNT = 2**63 - 1
+# Last parsed state per path, tagged with the file's (mtime_ns, size, inode).
+# _write_state refreshes the entry itself, so our own saves never depend on
+# mtime resolution; os.replace also gives every save a new inode.
+_STATE_CACHE: dict[str, tuple[tuple[int, int, int], dict[int, int]]] = {}
+# Set ATM_PRETTY=1 to write an indented, human-readable state file.
+_PRETTY_STATE = os.environ.get("ATM_PRETTY") == "1"
+
+def _state_stamp(path: str) -> tuple[int, int, int]:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _encode_state(cash: dict[int, int]) -> bytes:
+    # orjson only indents by 2, so the pretty form is always hand-rolled to
+    # match the original indent=4 file whichever backend is installed.
+    if _PRETTY_STATE:
+        return ("{\n" + ",\n".join(f'    "{d}": {c}' for d, c in cash.items()) + "\n}").encode()
+    if orjson is not None:
+        return orjson.dumps(cash, option=orjson.OPT_NON_STR_KEYS)
+    return ("{" + ",".join(f'"{d}":{c}' for d, c in cash.items()) + "}").encode()
+
+def _decode_state(raw: bytes) -> dict[int, int]:
+    # The state file is a flat JSON object of "denomination": count pairs;
+    # anything else is treated as corrupt rather than partially loaded.
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    if not isinstance(data, dict) or not data:
+        raise ValueError("state is not a non-empty JSON object")
+    cash = {}
+    for denom, count in data.items():
+        if not (denom.isascii() and denom.isdigit()) or int(denom) == 0:
+            raise ValueError(f"invalid denomination in state: {denom!r}")
+        if type(count) is not int or not 0 <= count <= _MAX_COUNT:
+            raise ValueError(f"invalid note count for {denom}: {count!r}")
+        cash[int(denom)] = count
+    return cash
+
+def _solve_breakdown(denoms: tuple[int, ...], counts: tuple[int, ...], amount: int) -> Optional[Plan]:
+    unit = reduce(gcd, denoms, amount)
+    cells = amount // unit
+
+    # Bounded stock: split each denomination's usable notes into bundles of
+    # 1, 2, 4, ... so every count is reachable with 0/1 choices per bundle.
+    bundles = []
+    for denom, stock in zip(denoms, counts):
+        available = min(stock, amount // denom)
+        size = 1
+        while available > 0:
+            take = min(size, available)
+            bundles.append((denom, take))
+            available -= take
+            size *= 2
+
+    # Prune: bail out if every usable note together falls short, and never
+    # scan past what the bundles processed so far can add up to.
+    if sum(denom // unit * take for denom, take in bundles) < cells:
+        return None
+
+    # T[x] holds the fewest notes that make x units; took[i][x] records
+    # whether bundle i was used to reach that minimum.
+    unreachable = _UNREACHABLE
+    T = array('i', [unreachable] * (cells + 1))
+    T[0] = 0
+    took = []
+    reach = 0
+    for denom, take in bundles:
+        weight = denom // unit * take
+        reach = min(cells, reach + weight)
+        used = bytearray(cells + 1)
+        # Walk target and source cells in lockstep and skip unreachable
+        # sources before doing any arithmetic.
+        for x, prev in zip(range(reach, weight - 1, -1), T[reach - weight::-1]):
+            if prev != unreachable:
+                candidate = prev + take
+                if candidate < T[x]:
+                    T[x] = candidate
+                    used[x] = 1
+        took.append(used)
+
+    if T[cells] == unreachable:
+        return None
+    plan: dict[int, int] = {}
+    x = cells
+    for (denom, take), used in zip(reversed(bundles), reversed(took)):
+        if used[x]:
+            plan[denom] = plan.get(denom, 0) + take
+            x -= denom // unit * take
+    return tuple((d, plan[d]) for d in denoms if d in plan)
+
+def _jit_breakdown(denoms: tuple[int, ...], counts: tuple[int, ...], amount: int) -> Optional[Plan]:
+    unit = reduce(gcd, denoms, amount)
+    units = np.asarray([d // unit for d in denoms], dtype=np.int32)
+    stock = np.asarray(
+        [min(c, amount // d) for d, c in zip(denoms, counts)], dtype=np.int32
+    )
+    result = dp_breakdown(units, stock, amount // unit)
+    if result[0] < 0:
+        return None
+    return tuple((d, int(c)) for d, c in zip(denoms, result) if c)
+
+@lru_cache(maxsize=1024)
+def _breakdown_cached(denoms: tuple[int, ...], counts: tuple[int, ...], amount: int) -> Optional[Plan]:
+    # Greedy is optimal for canonical sets like {500, 200, 100}; only fall
+    # back to the DP when it leaves a remainder.
+    plan = []
+    remainder = amount
+    for denom, stock in zip(denoms, counts):
+        count = min(stock, remainder // denom)
+        if count:
+            plan.append((denom, count))
+            remainder -= count * denom
+    if remainder == 0:
+        return tuple(plan)
+
+    if dp_breakdown is not None:
+        return _jit_breakdown(denoms, counts, amount)
+    return _solve_breakdown(denoms, counts, amount)
 
 class ATM:
-    def __init__(self, state_file="cash_state.json"):
+    _denoms: tuple[int, ...]
+    _counts: "array[int]"
+    _index: dict[int, int]
+    _total: int
+
+    def __init__(self, state_file: str = "cash_state.json") -> None:
         self.state_file = state_file
         self.cash = {500: 20, 200: 20, 100: 20}
+        self._dirty = False
+        self._buffer_depth = 0
         self.load_state()
 
-    def load_state(self):
+    @property
+    def cash(self) -> Mapping[int, int]:
+        # Read-only snapshot: stock changes go through add_cash/withdraw, or
+        # by assigning a whole new dict to cash.
+        return MappingProxyType(dict(zip(self._denoms, self._counts)))
+
+    @cash.setter
+    def cash(self, cash: dict[int, int]) -> None:
+        # Denominations are kept sorted high to low alongside a parallel
+        # array of note counts; _index maps a denomination to its slot.
+        # Build the array before touching any attribute so an OverflowError
+        # leaves the previous stock intact.
+        denoms = tuple(sorted(cash, reverse=True))
+        counts = array('q', [cash[d] for d in denoms])
+        self._denoms = denoms
+        self._counts = counts
+        self._index = {d: i for i, d in enumerate(denoms)}
+        self._total = sum(d * c for d, c in zip(denoms, counts))
+
+    def load_state(self) -> None:
         if not os.path.exists(self.state_file):
             self.save_state()
-            return
-
-        try:
-            with open(self.state_file, "r") as f:
-                data = json.load(f)
-                self.cash = {int(k): v for k, v in data.items()}
+        else:
+            try:
+                stamp = _state_stamp(self.state_file)
+                cached = _STATE_CACHE.get(self.state_file)
+                if cached is not None and cached[0] == stamp:
+                    cash = cached[1]
+                else:
+                    with open(self.state_file, "rb") as f:
+                        cash = _decode_state(f.read())
+                    _STATE_CACHE[self.state_file] = (stamp, cash)
+                self.cash = cash
                 
 
                 
-        except (json.JSONDecodeError, ValueError) as e:
-            logging.error(f"Failed to load state: {e}")
-            print("Error loading system state. Resetting to default.")
-            self.save_state()
+            except (ValueError, OverflowError) as e:
+                logging.error("Failed to load state: %s", e)
+                print("Error loading system state. Resetting to default.")
+                self.save_state()
             
 
 
-        except IOError as e:
-            logging.error(f"IO Error during load: {e}")
-            print(f"System Error: {e}")
+            except IOError as e:
+                logging.error("IO Error during load: %s", e)
+                print(f"System Error: {e}")
+
+    @contextmanager
+    def buffered(self) -> Iterator["ATM"]:
+        self._buffer_depth += 1
+        try:
+            yield self
+        finally:
+            self._buffer_depth -= 1
+            if self._buffer_depth == 0 and self._dirty:
+                self._write_state()
 
-    def save_state(self):
+    def save_state(self) -> None:
+        if self._buffer_depth > 0:
+            self._dirty = True
+            return
+        self._write_state()
+
+    def _write_state(self) -> None:
         try:
             temp_file = self.state_file + ".tmp"
-            with open(temp_file, "w") as f:
-                json.dump(self.cash, f, indent=4)
-            
-            if os.path.exists(self.state_file):
-                os.remove(self.state_file)
-            os.rename(temp_file, self.state_file)
+            cash = dict(zip(self._denoms, self._counts))
+            with open(temp_file, "wb") as f:
+                f.write(_encode_state(cash))
+            os.replace(temp_file, self.state_file)
+            # Only a completed replace settles pending buffered changes.
+            self._dirty = False
+            _STATE_CACHE[self.state_file] = (_state_stamp(self.state_file), cash)
         except IOError as e:
-            logging.error(f"Failed to save state: {e}")
+            logging.error("Failed to save state: %s", e)
             print("Critical Error: Could not save transaction state.")
 
-    def add_cash(self, denomination, count):
-        if denomination not in self.cash:
+    def add_cash(self, denomination: int, count: int) -> None:
+        idx = self._index.get(denomination)
+        if idx is None:
             print("Invalid denomination.")
             return
-        self.cash[denomination] += count
+        if self._counts[idx] + count > _MAX_COUNT:
+            print("Invalid quantity.")
+            return
+        self._counts[idx] += count
+        self._total += denomination * count
         self.save_state()
-        logging.info(f"Admin added {count} notes of ₹{denomination}")
+        logging.info("Admin added %s notes of ₹%s", count, denomination)
         print(f"Added {count} notes of ₹{denomination}.")
 
-    def get_breakdown(self, amount):
-        denominations = sorted(self.cash.keys(), reverse=True)
-        
-        def solve(target, idx):
-            if target == 0:
-                return {}
-            if idx >= len(denominations):
-                return None
-            
-            denom = denominations[idx]
-            max_use = min(self.cash[denom], target // denom)
-            
-            for count in range(max_use, -1, -1):
-                remainder = target - (count * denom)
-                result = solve(remainder, idx + 1)
-                
-                if result is not None:
-                    if count > 0:
-                        result[denom] = count
-                    return result
-            return None
-
-        return solve(amount, 0)
+    def get_breakdown(self, amount: int) -> Optional[dict[int, int]]:
+        # Keyed on the full stock snapshot, so any add or withdrawal naturally
+        # misses. Plans are cached as tuples of (denomination, count) pairs.
+        plan = _breakdown_cached(self._denoms, tuple(self._counts), amount)
+        return dict(plan) if plan is not None else None
 
-    def withdraw(self, amount):
+    def withdraw(self, amount: int) -> dict[int, int]:
         try:
             if amount <= 0:
                 raise InvalidAmountError("Amount must be positive.")
             if amount % 100 != 0:
                 raise InvalidAmountError("Amount must be a multiple of 100.")
 
-            total_balance = sum(k * v for k, v in self.cash.items())
-            if amount > total_balance:
+            if amount > self._total:
                 raise InsufficientFundsError("ATM Insufficient funds.")
 
             plan = self.get_breakdown(amount)
@@ -94,23 +262,23 @@ class ATM:
                 raise InsufficientFundsError("Cannot dispense this amount with available denominations.")
 
             for denom, count in plan.items():
-                self.cash[denom] -= count
+                self._counts[self._index[denom]] -= count
+            self._total -= amount
             
             self.save_state()
-            logging.info(f"Withdrawal: ₹{amount} | Breakdown: {plan}")
+            logging.info("Withdrawal: ₹%s | Breakdown: %s", amount, plan)
             return plan
 
         except ATMError as e:
-            logging.warning(f"Transaction failed: {e}")
+            logging.warning("Transaction failed: %s", e)
             raise e
 
-    def get_status_report(self):
-        report = {
+    def get_status_report(self) -> dict[str, Any]:
+        report: dict[str, Any] = {
             "breakdown": {},
             "total": 0
         }
-        for denom in sorted(self.cash.keys(), reverse=True):
-            count = self.cash[denom]
+        for denom, count in zip(self._denoms, self._counts):
             val = denom * count
             report["breakdown"][denom] = {"count": count, "value": val}
             report["total"] += val
@@ -0,0 +1,77 @@
+try:
+    import numpy as np
+    from numba import njit, int32
+except ImportError:
+    np = None  # type: ignore[assignment]
+    njit = None  # type: ignore[assignment]
+
+_UNREACHABLE = 10**9
+
+
+def _dp_breakdown(denoms, stock, amount):
+    # denoms and amount are in the same unit (e.g. hundreds); stock[i] is the
+    # usable note count for denoms[i]. Returns per-denomination counts, or -1
+    # in every slot when the amount cannot be made.
+    n = denoms.shape[0]
+
+    nbundles = 0
+    for i in range(n):
+        available = stock[i]
+        size = 1
+        while available > 0:
+            available -= min(size, available)
+            size *= 2
+            nbundles += 1
+
+    bundle_idx = np.empty(nbundles, dtype=np.int32)
+    bundle_take = np.empty(nbundles, dtype=np.int32)
+    b = 0
+    for i in range(n):
+        available = stock[i]
+        size = 1
+        while available > 0:
+            take = min(size, available)
+            bundle_idx[b] = i
+            bundle_take[b] = take
+            available -= take
+            size *= 2
+            b += 1
+
+    counts = np.zeros(n, dtype=np.int32)
+    capacity = 0
+    for b in range(nbundles):
+        capacity += denoms[bundle_idx[b]] * bundle_take[b]
+    if capacity < amount:
+        counts[:] = -1
+        return counts
+
+    T = np.full(amount + 1, _UNREACHABLE, dtype=np.int32)
+    T[0] = 0
+    took = np.zeros((nbundles, amount + 1), dtype=np.uint8)
+    reach = 0
+    for b in range(nbundles):
+        take = bundle_take[b]
+        weight = denoms[bundle_idx[b]] * take
+        reach = min(amount, reach + weight)
+        for x in range(reach, weight - 1, -1):
+            candidate = T[x - weight] + take
+            if candidate < T[x]:
+                T[x] = candidate
+                took[b, x] = 1
+
+    if T[amount] == _UNREACHABLE:
+        counts[:] = -1
+        return counts
+
+    x = amount
+    for b in range(nbundles - 1, -1, -1):
+        if took[b, x]:
+            counts[bundle_idx[b]] += bundle_take[b]
+            x -= denoms[bundle_idx[b]] * bundle_take[b]
+    return counts
+
+
+if njit is not None:
+    dp_breakdown = njit(int32[:](int32[:], int32[:], int32), cache=True)(_dp_breakdown)
+else:
+    dp_breakdown = None
@@ -1,41 +1,58 @@
 import logging
-import traceback
+import logging.handlers
+from typing import Callable, Optional
 from exceptions import ATMError, InsufficientFundsError, InvalidAmountError
 
 class ErrorHandler:
     
-    def __init__(self, log_file='atm_transactions.log'):
+    def __init__(self, log_file: str = 'atm_transactions.log') -> None:
         self.setup_logging(log_file)
+        # User-facing message per error type; subclasses resolve to their
+        # nearest listed base via the MRO in handle_user_error.
+        self._handlers: dict[type, Callable[[BaseException], str]] = {
+            InsufficientFundsError: lambda e: "Transaction Declined: Insufficient funds in ATM.",
+            InvalidAmountError: lambda e: f"Input Error: {e}",
+            ATMError: lambda e: f"ATM Error: {e}",
+            ValueError: lambda e: "Input Error: Please enter a valid number.",
+        }
     
-    def setup_logging(self, log_file):
-        logging.basicConfig(
-            filename=log_file,
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
+    def setup_logging(self, log_file: str) -> None:
+        root = logging.getLogger()
+        # Like basicConfig, leave an already-configured root logger alone so
+        # a second ErrorHandler does not duplicate every record.
+        if root.handlers:
+            return
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(
+            logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         )
+        # Buffer records and write them in batches; errors flush immediately,
+        # and logging.shutdown() flushes whatever is left at exit.
+        handler = logging.handlers.MemoryHandler(
+            capacity=128, flushLevel=logging.ERROR, target=file_handler
+        )
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
 
-    def log_transaction(self, message):
+    def log_transaction(self, message: str) -> None:
         logging.info(message)
 
-    def log_system_error(self, message, error=None):
-        error_msg = f"{message}: {str(error)}" if error else message
-        logging.error(error_msg)
+    def log_system_error(self, message: str, error: Optional[BaseException] = None) -> None:
         if error:
-            logging.debug(traceback.format_exc())
+            logging.error("%s: %s", message, error)
+            logging.debug("Traceback", exc_info=error)
+        else:
+            logging.error(message)
 
-    def handle_user_error(self, error):
-        logging.warning(f"User Action Failed: {str(error)}")
+    def handle_user_error(self, error: BaseException) -> str:
+        logging.warning("User Action Failed: %s", error)
 
-        if isinstance(error, InsufficientFundsError):
-            return "Transaction Declined: Insufficient funds in ATM."
-        elif isinstance(error, InvalidAmountError):
-            return f"Input Error: {str(error)}"
-        elif isinstance(error, ATMError):
-            return f"ATM Error: {str(error)}"
-        elif isinstance(error, ValueError):
-            return "Input Error: Please enter a valid number."
-        else:
-            self.log_system_error("Unexpected UI Error", error)
-            return "An unexpected system error occurred. Please contact support."
+        for klass in type(error).__mro__:
+            handler = self._handlers.get(klass)
+            if handler is not None:
+                return handler(error)
+
+        self.log_system_error("Unexpected UI Error", error)
+        return "An unexpected system error occurred. Please contact support."
 
 error_manager = ErrorHandler()
@@ -1,7 +1,9 @@
-import sys
+import re
 from atm_core import ATM
 from error_handling import error_manager
 
+_NUM_RE = re.compile(r'\A\d+\Z')
+
 def display_status(atm):
     report = atm.get_status_report()
     print("\n--- ATM Status ---")
@@ -29,7 +31,7 @@ def main():
         if choice == "1":
             try:
                 raw_amt = input("Enter withdrawal amount: ")
-                if not raw_amt.isdigit():
+                if not _NUM_RE.match(raw_amt):
                     raise ValueError("Amount must be numeric")
                     
                 amount = int(raw_amt)
@@ -47,7 +49,7 @@ def main():
         elif choice == "2":
             try:
                 denom_input = input("Enter denomination (100, 200, 500): ")
-                if not denom_input.isdigit():
+                if not _NUM_RE.match(denom_input):
                     raise ValueError("Denomination must be numeric")
                 denom = int(denom_input)
                 
@@ -55,7 +57,7 @@ def main():
                      raise ValueError("Invalid denomination")
 
                 count_input = input("Enter quantity to add: ")
-                if not count_input.isdigit():
+                if not _NUM_RE.match(count_input):
                     raise ValueError("Quantity must be numeric")
                 count = int(count_input)
                 
@@ -0,0 +1,194 @@
+import os
+
+import pytest
+
+import atm_core
+from atm_core import ATM
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "state.json")
+
+
+@pytest.fixture
+def atm(state_path):
+    return ATM(state_path)
+
+
+def read_state(path):
+    with open(path, "rb") as f:
+        return atm_core._decode_state(f.read())
+
+
+def count_writes(monkeypatch, atm):
+    writes = []
+    real_write = atm._write_state
+
+    def spy():
+        writes.append(dict(atm.cash))
+        real_write()
+
+    monkeypatch.setattr(atm, "_write_state", spy)
+    return writes
+
+
+def test_buffered_writes_once_at_outermost_exit(monkeypatch, atm, state_path):
+    writes = count_writes(monkeypatch, atm)
+    with atm.buffered():
+        atm.add_cash(100, 1)
+        with atm.buffered():
+            atm.add_cash(200, 2)
+            atm.withdraw(500)
+        assert writes == []
+        assert read_state(state_path)[100] == 20
+    assert writes == [{500: 19, 200: 22, 100: 21}]
+    assert read_state(state_path) == {500: 19, 200: 22, 100: 21}
+
+
+def test_buffered_skips_write_when_nothing_changed(monkeypatch, atm):
+    writes = count_writes(monkeypatch, atm)
+    with atm.buffered():
+        pass
+    assert writes == []
+
+
+def test_buffered_writes_when_body_raises(atm, state_path):
+    with pytest.raises(RuntimeError):
+        with atm.buffered():
+            atm.add_cash(100, 5)
+            raise RuntimeError("boom")
+    assert read_state(state_path)[100] == 25
+
+
+def test_failed_write_keeps_buffered_changes_pending(monkeypatch, atm, state_path):
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    with atm.buffered():
+        atm.add_cash(100, 5)
+    assert atm._dirty
+    assert read_state(state_path)[100] == 20
+
+    monkeypatch.undo()
+    with atm.buffered():
+        pass
+    assert not atm._dirty
+    assert read_state(state_path)[100] == 25
+
+
+def test_add_cash_rejects_count_overflow(atm, state_path, capsys):
+    atm.add_cash(500, 2**64)
+    assert "Invalid quantity." in capsys.readouterr().out
+    assert atm.cash[500] == 20
+    assert read_state(state_path)[500] == 20
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize("count", ["18446744073709551615", "99999999999999999999"])
+def test_oversized_count_in_state_file_resets(monkeypatch, state_path, use_orjson, count):
+    if use_orjson and atm_core.orjson is None:
+        pytest.skip("orjson is not installed")
+    if not use_orjson:
+        monkeypatch.setattr(atm_core, "orjson", None)
+    with open(state_path, "w") as f:
+        f.write('{"500": %s, "200": 1}' % count)
+    assert dict(ATM(state_path).cash) == {500: 20, 200: 20, 100: 20}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize(
+    "raw",
+    [
+        b'{"500": 18446744073709551615}',
+        b'{"500": 9223372036854775808}',
+        b'{"500": 99999999999999999999}',
+        b'{"500": -1}',
+        b'{"500": 20.5}',
+        b'{"500": [1]}',
+    ],
+)
+def test_decode_state_rejects_bad_counts_on_both_backends(monkeypatch, use_orjson, raw):
+    if use_orjson and atm_core.orjson is None:
+        pytest.skip("orjson is not installed")
+    if not use_orjson:
+        monkeypatch.setattr(atm_core, "orjson", None)
+    with pytest.raises(ValueError):
+        atm_core._decode_state(raw)
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_decode_state_accepts_largest_count(monkeypatch, use_orjson):
+    if use_orjson and atm_core.orjson is None:
+        pytest.skip("orjson is not installed")
+    if not use_orjson:
+        monkeypatch.setattr(atm_core, "orjson", None)
+    assert atm_core._decode_state(b'{"500": 9223372036854775807}') == {500: 2**63 - 1}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize(
+    "pretty, expected",
+    [
+        (False, b'{"500":20,"200":1}'),
+        (True, b'{\n    "500": 20,\n    "200": 1\n}'),
+    ],
+)
+def test_encode_state_is_backend_independent(monkeypatch, use_orjson, pretty, expected):
+    if use_orjson and atm_core.orjson is None:
+        pytest.skip("orjson is not installed")
+    if not use_orjson:
+        monkeypatch.setattr(atm_core, "orjson", None)
+    monkeypatch.setattr(atm_core, "_PRETTY_STATE", pretty)
+    assert atm_core._encode_state({500: 20, 200: 1}) == expected
+
+
+def count_decodes(monkeypatch):
+    decodes = []
+    real_decode = atm_core._decode_state
+
+    def spy(raw):
+        decodes.append(raw)
+        return real_decode(raw)
+
+    monkeypatch.setattr(atm_core, "_decode_state", spy)
+    return decodes
+
+
+def test_state_cache_hit_after_save(monkeypatch, atm, state_path):
+    atm.withdraw(700)
+    decodes = count_decodes(monkeypatch)
+    again = ATM(state_path)
+    assert decodes == []
+    assert dict(again.cash) == dict(atm.cash)
+    assert atm_core._STATE_CACHE[state_path][0] == atm_core._state_stamp(state_path)
+
+
+def test_state_cache_miss_after_external_rewrite(monkeypatch, atm, state_path):
+    stamp = atm_core._STATE_CACHE[state_path][0]
+    # Same size as the cached file, and written in place (same inode); only
+    # the content and mtime differ.
+    with open(state_path, "rb") as f:
+        size = len(f.read())
+    payload = b'{"500":21,"200":20,"100":20}'
+    assert len(payload) == size
+    with open(state_path, "wb") as f:
+        f.write(payload)
+    os.utime(state_path, ns=(stamp[0] + 1_000_000_000, stamp[0] + 1_000_000_000))
+
+    decodes = count_decodes(monkeypatch)
+    assert ATM(state_path).cash[500] == 21
+    assert len(decodes) == 1
+
+
+def test_state_cache_keeps_one_entry_per_path(tmp_path):
+    first = str(tmp_path / "first.json")
+    second = str(tmp_path / "second.json")
+    atm = ATM(first)
+    for _ in range(3):
+        atm.add_cash(100, 1)
+        ATM(first)
+    ATM(second)
+    assert [key for key in atm_core._STATE_CACHE if key in (first, second)] == [first, second]
+    assert atm_core._STATE_CACHE[first][1] == {500: 20, 200: 20, 100: 23}
@@ -0,0 +1,95 @@
+import itertools
+import random
+
+import pytest
+
+import atm_core
+from atm_core import ATM, _breakdown_cached, _jit_breakdown, _solve_breakdown
+from atm_kernels import dp_breakdown
+
+DENOMINATION_SETS = [(500, 200, 100), (700, 300, 200), (500, 300)]
+
+needs_numba = pytest.mark.skipif(dp_breakdown is None, reason="numba is not installed")
+
+
+def brute_force_min_notes(denoms, counts, amount):
+    best = None
+    ranges = [range(min(c, amount // d) + 1) for d, c in zip(denoms, counts)]
+    for combo in itertools.product(*ranges):
+        if sum(d * n for d, n in zip(denoms, combo)) == amount:
+            notes = sum(combo)
+            best = notes if best is None else min(best, notes)
+    return best
+
+
+def random_cases(n=1500, seed=1):
+    rng = random.Random(seed)
+    for _ in range(n):
+        denoms = rng.choice(DENOMINATION_SETS)
+        counts = tuple(rng.randint(0, 6) for _ in denoms)
+        yield denoms, counts, rng.randint(1, 40) * 100
+
+
+def assert_plan_ok(plan, denoms, counts, amount):
+    expected = brute_force_min_notes(denoms, counts, amount)
+    if expected is None:
+        assert plan is None
+        return
+    assert plan is not None
+    stock = dict(zip(denoms, counts))
+    assert sum(d * n for d, n in plan) == amount
+    assert all(0 < n <= stock[d] for d, n in plan)
+    assert sum(n for _, n in plan) == expected
+    # Highest denomination first, as Plan promises.
+    assert [d for d, _ in plan] == [d for d in denoms if d in dict(plan)]
+
+
+def test_python_dp_matches_brute_force():
+    for denoms, counts, amount in random_cases():
+        assert_plan_ok(_solve_breakdown(denoms, counts, amount), denoms, counts, amount)
+
+
+@needs_numba
+def test_numba_dp_matches_brute_force():
+    for denoms, counts, amount in random_cases():
+        assert_plan_ok(_jit_breakdown(denoms, counts, amount), denoms, counts, amount)
+
+
+@needs_numba
+def test_backends_return_identical_plans():
+    for denoms, counts, amount in random_cases(seed=2):
+        assert _solve_breakdown(denoms, counts, amount) == _jit_breakdown(denoms, counts, amount)
+
+
+@pytest.mark.parametrize(
+    "counts, amount, expected",
+    [
+        ((1, 3, 0), 600, ((200, 3),)),
+        ((1, 4, 0), 800, ((200, 4),)),
+        ((3, 3, 0), 1100, ((500, 1), (200, 3))),
+        ((1, 1, 0), 600, None),
+    ],
+)
+def test_greedy_miss_falls_back_to_dp(counts, amount, expected):
+    denoms = (500, 200, 100)
+    assert _breakdown_cached(denoms, counts, amount) == expected
+    assert _solve_breakdown(denoms, counts, amount) == expected
+    if dp_breakdown is not None:
+        assert _jit_breakdown(denoms, counts, amount) == expected
+
+
+def test_python_fallback_is_used_without_numba(monkeypatch):
+    monkeypatch.setattr(atm_core, "dp_breakdown", None)
+    _breakdown_cached.cache_clear()
+    try:
+        assert _breakdown_cached((500, 200, 100), (1, 3, 0), 600) == ((200, 3),)
+    finally:
+        _breakdown_cached.cache_clear()
+
+
+def test_withdraw_dispenses_dp_plan(tmp_path):
+    atm = ATM(str(tmp_path / "state.json"))
+    atm.cash = {500: 1, 200: 3, 100: 0}
+    assert atm.withdraw(600) == {200: 3}
+    assert dict(atm.cash) == {500: 1, 200: 0, 100: 0}
+    assert dict(ATM(str(tmp_path / "state.json")).cash) == {500: 1, 200: 0, 100: 0}